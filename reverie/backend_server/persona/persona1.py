@@ -12,6 +12,10 @@ import math
 import sys
 import datetime
 import random
+import time
+from operator import itemgetter
+import numpy as np
+from numba import njit
 sys.path.append('../')
 from global_methods import *
 
@@ -27,19 +31,131 @@ from persona.cognitive_modules.execute import *
 from persona.cognitive_modules.converse import *
 
 
+@njit(cache=True, fastmath=True)
+def _sum_return(price, purchase):
+    """
+    Sum of per-stock returns, (price - purchase) / purchase, in a single pass.
+
+    :param price: np.ndarray - Current price of each holding.
+    :param purchase: np.ndarray - Purchase price of each holding.
+    :return: float - The summed return.
+    """
+    s = 0.0
+    for i in range(price.shape[0]):
+        s += (price[i] - purchase[i]) / purchase[i]
+    return s
+
+
+@njit(cache=True, fastmath=True)
+def _sum_risk(risk):
+    """
+    Sum of risk scores over all holdings.
+
+    :param risk: np.ndarray - Risk score of each holding.
+    :return: float - The summed risk score.
+    """
+    s = 0.0
+    for i in range(risk.shape[0]):
+        s += risk[i]
+    return s
+
+
+@njit(cache=True, fastmath=True)
+def _rebalance_amounts(qty, price, desired, should_rebalance, total_pv, out):
+    """
+    Quantity each holding must trade to reach its desired allocation, written
+    into out in a single pass. Rows that are not rebalanced get 0.
+
+    :param qty: np.ndarray - Quantity of each holding.
+    :param price: np.ndarray - Current price of each holding.
+    :param desired: np.ndarray - Desired allocation of each holding.
+    :param should_rebalance: np.ndarray - Whether each holding is rebalanced.
+    :param total_pv: float - Total portfolio value.
+    :param out: np.ndarray - Output buffer, same length as qty.
+    """
+    for i in range(qty.shape[0]):
+        if should_rebalance[i]:
+            out[i] = desired[i] * total_pv / price[i] - qty[i]
+        else:
+            out[i] = 0.0
+
+
+# Compile the kernels at import so the first real call doesn't pay for it
+_sum_return(np.ones(2), np.ones(2))
+_sum_risk(np.zeros(2))
+_rebalance_amounts(np.ones(2), np.ones(2), np.zeros(2), np.zeros(2, dtype=np.bool_), 1.0, np.empty(2))
+
+
 class Persona:
-    def __init__(self, name, role):
+    # Personas are created once per agent and their attributes are read in
+    # every portfolio operation, so skip the per-instance __dict__
+    __slots__ = (
+        'name', 'role', 'market_knowledge', 'risk_tolerance', 'cash_reserves',
+        'transaction_symbols', 'trade_size',
+        '_symbols', '_qty', '_price', '_purchase_price', '_risk_score',
+        '_desired_allocation', '_should_rebalance', '_idx', '_n',
+        '_pv',
+        '_mk_symbols', '_mk_price', '_mk_flags', '_mk_idx',
+        '_tx', '_tx_head', '_tx_full', '_tx_sym_ids',
+        '_folder_mem_saved', '_investments_loaded',
+    )
+
+    # Baseline market knowledge, shared by every persona until it does its own
+    # market research. Neither this dict nor the arrays built from it are ever
+    # mutated in place; updates give the persona new objects instead.
+    _DEFAULT_MK = {
+        'StockA': {'current_price': 100, 'sentiment': 0.6, 'is_undervalued': True},
+        'StockB': {'current_price': 150, 'sentiment': 0.4, 'is_undervalued': False}
+        # ... other initial market data ...
+    }
+    _default_mk_arrays = None      # (_mk_symbols, _mk_price, _mk_flags, _mk_idx) for _DEFAULT_MK
+
+    # Transaction history is kept in a fixed-size ring buffer; once full, the
+    # oldest transactions are overwritten
+    TX_CAPACITY = 4096
+    TX_DTYPE = np.dtype([('t', 'i8'), ('side', 'u1'), ('sym', 'i4'), ('qty', 'f8'), ('px', 'f8')])
+    TX_BUY = 0
+    TX_SELL = 1
+
+    # Bits of the per-stock market signal flags
+    MK_SENTIMENT_POS = 1 << 0      # sentiment > 0.5
+    MK_UNDERVALUED = 1 << 1
+    MK_OVERVALUED = 1 << 2
+    MK_SENTIMENT_NEG = 1 << 3      # sentiment < 0.5
+    MK_BUY = MK_SENTIMENT_POS | MK_UNDERVALUED
+    MK_SELL = MK_SENTIMENT_NEG | MK_OVERVALUED
+
+    def __init__(self, name, role, folder_mem_saved=False):
             self.name = name
             self.role = role
-            self.current_investments = {}  # Dictionary to store current investments
-            self.market_knowledge = {}     # Dictionary to store market knowledge
             self.risk_tolerance = 0.5      # Default risk tolerance
             self.cash_reserves = 100000    # Example initial cash reserves
-            self.transaction_history = []  # List to store transaction history
+            self.transaction_symbols = []  # Stock symbol for each 'sym' id in transaction_history
+            self.trade_size = 1            # Quantity bought or sold on a market signal
+
+            # Portfolio holdings, stored as parallel arrays (one row per stock)
+            self._symbols = np.empty(0, dtype=object)
+            self._qty = np.empty(0, dtype=np.float64)
+            self._price = np.empty(0, dtype=np.float64)
+            self._purchase_price = np.empty(0, dtype=np.float64)
+            self._risk_score = np.empty(0, dtype=np.float64)
+            self._desired_allocation = np.empty(0, dtype=np.float64)
+            self._should_rebalance = np.empty(0, dtype=np.bool_)
+            self._idx = {}                 # Stock symbol -> row in the arrays above
+            self._n = 0                    # Number of holdings
+            self._pv = 0.0                 # Total portfolio value, kept up to date by the mutators
+
+            # Transaction ring buffer, see transaction_history
+            self._tx = np.zeros(self.TX_CAPACITY, dtype=self.TX_DTYPE)
+            self._tx_head = 0              # Next slot to write
+            self._tx_full = False          # Set once the buffer has wrapped around
+            self._tx_sym_ids = {}          # Stock symbol -> 'sym' id
             
-            # Initialize market knowledge and investments
+            # Initialize market knowledge; investments are only loaded once the
+            # portfolio is first used, see _ensure_investments_loaded
             self.initialize_market_knowledge()
-            self.initialize_investments(folder_mem_saved)
+            self._folder_mem_saved = folder_mem_saved
+            self._investments_loaded = False
             
             
     def initialize_market_knowledge(self):
@@ -48,33 +164,136 @@ class Persona:
         """
         # Example: Initialize with static data
         # In a real scenario, this might involve fetching data from a financial data API
-        self.market_knowledge = {
-            'StockA': {'current_price': 100, 'sentiment': 0.6, 'is_undervalued': True},
-            'StockB': {'current_price': 150, 'sentiment': 0.4, 'is_undervalued': False}
-            # ... other initial market data ...
-        }
+        self.market_knowledge = self._DEFAULT_MK
+        if self._default_mk_arrays is None:
+            self._index_market_knowledge()
+            type(self)._default_mk_arrays = (self._mk_symbols, self._mk_price, self._mk_flags, self._mk_idx)
+        else:
+            self._mk_symbols, self._mk_price, self._mk_flags, self._mk_idx = self._default_mk_arrays
+
+    def _index_market_knowledge(self):
+        """
+        Rebuild the market arrays from market_knowledge. Must be called
+        whenever market_knowledge changes.
+
+        Market arrays (one row per stock): _mk_symbols, _mk_price, _mk_flags
+        (MK_* bits) and _mk_idx (stock symbol -> row).
+        """
+        infos = list(self.market_knowledge.values())
+        n = len(infos)
+        self._mk_symbols = np.array(list(self.market_knowledge), dtype=object)
+        self._mk_price = np.fromiter(map(itemgetter('current_price'), infos), dtype=np.float64, count=n)
+        sentiment = np.fromiter(map(itemgetter('sentiment'), infos), dtype=np.float64, count=n)
+        is_undervalued = np.fromiter(map(itemgetter('is_undervalued'), infos), dtype=np.bool_, count=n)
+        # Stocks without an explicit 'is_overvalued' are overvalued iff not undervalued
+        is_overvalued = np.fromiter((info.get('is_overvalued', not info['is_undervalued']) for info in infos), dtype=np.bool_, count=n)
+        self._mk_flags = ((sentiment > 0.5).astype(np.uint8) * self.MK_SENTIMENT_POS
+                          | is_undervalued.astype(np.uint8) * self.MK_UNDERVALUED
+                          | is_overvalued.astype(np.uint8) * self.MK_OVERVALUED
+                          | (sentiment < 0.5).astype(np.uint8) * self.MK_SENTIMENT_NEG)
+        self._mk_idx = {stock: i for i, stock in enumerate(self._mk_symbols)}
 
     def initialize_investments(self, folder_mem_saved):
         """
         Initialize or load the persona's investment portfolio.
         """
+        self._investments_loaded = True
         if folder_mem_saved:
-            # Load investments from saved memory
-            # This would involve reading from a file or database
-            # Example: Read JSON file and update current_investments
+            # Load investments from saved memory. The holding arrays are
+            # stored as-is in investments.npz; older saves only have
+            # investments.json, which becomes npz the next time the
+            # portfolio is saved with save_investments. Loading never writes.
             try:
-                with open(f"{folder_mem_saved}/investments.json", 'r') as file:
-                    self.current_investments = json.load(file)
+                with np.load(f"{folder_mem_saved}/investments.npz") as data:
+                    self._symbols = data['symbols'].astype(object)
+                    self._qty = data['qty']
+                    self._price = data['price']
+                    self._purchase_price = data['purchase_price']
+                    self._risk_score = data['risk_score']
+                    self._desired_allocation = data['desired_allocation']
+                    self._should_rebalance = data['should_rebalance']
+                self._idx = {stock: i for i, stock in enumerate(self._symbols)}
+                self._n = len(self._idx)
+                self._pv = float(self._qty @ self._price)
             except IOError:
-                print("Saved investments file not found. Initializing new investments.")
-                self.current_investments = {}
+                try:
+                    with open(f"{folder_mem_saved}/investments.json", 'r') as file:
+                        self.set_investments(json.load(file))
+                except IOError:
+                    print("Saved investments file not found. Initializing new investments.")
+                    self.set_investments({})
         else:
             # Initialize new investments
-            self.current_investments = {
+            self.set_investments({
                 # Example initial investment structure
                 # 'StockA': {'quantity': 10, 'purchase_price': 100, 'current_price': 100},
                 # 'StockB': {'quantity': 5, 'purchase_price': 150, 'current_price': 150}
+            })
+
+    def set_investments(self, investments):
+        """
+        Replace the portfolio with the given holdings.
+
+        :param investments: dict - Stock symbol -> dict with 'quantity',
+            'current_price' and optionally 'purchase_price', 'risk_score',
+            'desired_allocation' and 'should_rebalance'.
+        """
+        infos = list(investments.values())
+        n = len(infos)
+        self._symbols = np.array(list(investments), dtype=object)
+        self._qty = np.fromiter(map(itemgetter('quantity'), infos), dtype=np.float64, count=n)
+        self._price = np.fromiter(map(itemgetter('current_price'), infos), dtype=np.float64, count=n)
+        self._purchase_price = np.fromiter((info.get('purchase_price', info['current_price']) for info in infos), dtype=np.float64, count=n)
+        self._risk_score = np.fromiter((info.get('risk_score', 0.0) for info in infos), dtype=np.float64, count=n)
+        self._desired_allocation = np.fromiter((info.get('desired_allocation', 0.0) for info in infos), dtype=np.float64, count=n)
+        self._should_rebalance = np.fromiter((info.get('should_rebalance', False) for info in infos), dtype=np.bool_, count=n)
+        self._idx = {stock: i for i, stock in enumerate(self._symbols)}
+        self._n = len(self._idx)
+        self._pv = float(self._qty @ self._price)
+        self._investments_loaded = True
+
+    def _ensure_investments_loaded(self):
+        """
+        Load the portfolio from folder_mem_saved the first time it is used.
+        """
+        if not self._investments_loaded:
+            self.initialize_investments(self._folder_mem_saved)
+
+    def save_investments(self, save_folder):
+        """
+        Save the persona's investment portfolio to investments.npz.
+
+        :param save_folder: str - The folder where the portfolio is saved.
+        """
+        self._ensure_investments_loaded()
+        np.savez(f"{save_folder}/investments.npz",
+                 symbols=self._symbols.astype(str),
+                 qty=self._qty,
+                 price=self._price,
+                 purchase_price=self._purchase_price,
+                 risk_score=self._risk_score,
+                 desired_allocation=self._desired_allocation,
+                 should_rebalance=self._should_rebalance)
+
+    @property
+    def current_investments(self):
+        """
+        Dictionary view of the portfolio, rebuilt from the holding arrays.
+
+        :return: dict - Stock symbol -> information about the stock.
+        """
+        self._ensure_investments_loaded()
+        return {
+            stock: {
+                'quantity': float(self._qty[i]),
+                'current_price': float(self._price[i]),
+                'purchase_price': float(self._purchase_price[i]),
+                'risk_score': float(self._risk_score[i]),
+                'desired_allocation': float(self._desired_allocation[i]),
+                'should_rebalance': bool(self._should_rebalance[i]),
             }
+            for stock, i in self._idx.items()
+        }
 
 
 
@@ -82,106 +301,156 @@ class Persona:
             """
             Manage the persona's investment portfolio.
             """
-            # Rebalance logic
-            for stock, info in self.current_investments.items():
-                if info['should_rebalance']:
-                    self.rebalance_stock(stock, info)
-
-            # Simple buying/selling logic based on a predefined strategy
-            for stock, market_info in self.market_knowledge.items():
-                if self.should_buy(stock, market_info):
-                    self.buy_stock(stock, market_info)
-                elif self.should_sell(stock, market_info):
-                    self.sell_stock(stock, market_info)
-
-    def rebalance_stock(self, stock, info):
+            self._ensure_investments_loaded()
+            # Targets are computed against the portfolio value at the start of the tick
+            total_pv = self.total_portfolio_value()
+
+            # Simple buying/selling logic based on a predefined strategy,
+            # evaluated for every stock at once
+            buy_mask = self.should_buy()
+            sell_mask = self.should_sell() & ~buy_mask
+
+            # Give every stock with a buy signal a row, so that rebalancing and
+            # trading can share a single quantity delta over all holdings
+            for j in np.flatnonzero(buy_mask):
+                if self._mk_symbols[j] not in self._idx:
+                    self._add_stock(self._mk_symbols[j], 0.0, self._mk_price[j])
+            buy_rows = np.fromiter(map(self._idx.__getitem__, self._mk_symbols[buy_mask]), dtype=np.intp)
+            sell_rows = np.fromiter((self._idx[stock] for stock in self._mk_symbols[sell_mask] if stock in self._idx), dtype=np.intp)
+
+            # Rebalance logic: decide every holding's move to its desired
+            # allocation first, then apply all trades in one vector add
+            delta_qty = self.calculate_rebalance_amounts(total_pv)
+
+            # Trade on the signals; only sell what is actually held
+            delta_qty[buy_rows] += self.trade_size
+            can_sell = self._qty[sell_rows] + delta_qty[sell_rows] >= self.trade_size
+            delta_qty[sell_rows[can_sell]] -= self.trade_size
+
+            self._qty += delta_qty
+            self._pv += float(delta_qty @ self._price)
+
+            traded = np.flatnonzero(delta_qty)
+            self._record_transactions(np.where(delta_qty[traded] > 0, self.TX_BUY, self.TX_SELL),
+                                      self._symbols[traded], np.abs(delta_qty[traded]), self._price[traded])
+
+            # Remove the stocks whose quantity reached zero
+            emptied = np.flatnonzero(self._qty == 0)
+            if emptied.size:
+                self._remove_stocks(emptied)
+
+    def rebalance_stock(self, stock, total_pv=None):
         """
         Rebalance a specific stock in the portfolio.
 
         :param stock: str - Stock symbol.
-        :param info: dict - Information about the stock in the portfolio.
+        :param total_pv: float - Total portfolio value; computed if not given.
         """
-        desired_allocation = info['desired_allocation']
-        current_allocation = self.calculate_current_allocation(stock)
+        self._ensure_investments_loaded()
+        if total_pv is None:
+            total_pv = self.total_portfolio_value()
+        desired_allocation = self._desired_allocation[self._idx[stock]]
+        current_allocation = self.calculate_current_allocation(stock, total_pv)
 
         if current_allocation < desired_allocation:
             # Buy more of the stock to reach the desired allocation
-            amount_to_buy = self.calculate_amount_to_buy(stock, desired_allocation, current_allocation)
+            amount_to_buy = self.calculate_amount_to_buy(stock, desired_allocation, current_allocation, total_pv)
             self.buy_stock(stock, amount_to_buy)
         elif current_allocation > desired_allocation:
             # Sell some of the stock to reduce to the desired allocation
-            amount_to_sell = self.calculate_amount_to_sell(stock, desired_allocation, current_allocation)
+            amount_to_sell = self.calculate_amount_to_sell(stock, desired_allocation, current_allocation, total_pv)
             self.sell_stock(stock, amount_to_sell)
             
-    def calculate_current_allocation(self, stock):
+    def calculate_rebalance_amounts(self, total_pv):
+        """
+        Calculate, for every holding at once, the quantity to trade to reach
+        its desired allocation. Equivalent to rebalance_stock on each stock
+        flagged 'should_rebalance', but without mutating the portfolio.
+
+        :param total_pv: float - Total portfolio value.
+        :return: np.ndarray - Signed quantity per holding row; positive to buy,
+            negative to sell, 0 for stocks that are not rebalanced.
+        """
+        self._ensure_investments_loaded()
+        # (desired - current allocation) * total_pv / price, with the current
+        # allocation's division by total_pv cancelled out
+        amounts = np.empty(self._n)
+        _rebalance_amounts(self._qty, self._price, self._desired_allocation,
+                           self._should_rebalance, total_pv, amounts)
+        return amounts
+
+    def total_portfolio_value(self):
+        """
+        Total market value of the portfolio. Maintained incrementally on every
+        quantity or price change, so this is a plain attribute read.
+
+        :return: float - Sum of quantity * current price over all holdings.
+        """
+        self._ensure_investments_loaded()
+        return self._pv
+
+    def calculate_current_allocation(self, stock, total_pv=None):
         """
         Calculate the current allocation of a stock in the portfolio.
 
         :param stock: str - Stock symbol.
+        :param total_pv: float - Total portfolio value; computed if not given.
         :return: float - The current allocation percentage of the stock.
         """
-        total_portfolio_value = sum([info['quantity'] * info['current_price'] for info in self.current_investments.values()])
-        stock_value = self.current_investments[stock]['quantity'] * self.current_investments[stock]['current_price']
+        self._ensure_investments_loaded()
+        i = self._idx[stock]
+        total_portfolio_value = self.total_portfolio_value() if total_pv is None else total_pv
+        stock_value = self._qty[i] * self._price[i]
         
         return stock_value / total_portfolio_value if total_portfolio_value > 0 else 0
     
-    def calculate_amount_to_buy(self, stock, desired_allocation, current_allocation):
+    def calculate_amount_to_buy(self, stock, desired_allocation, current_allocation, total_pv):
         """
         Calculate the amount of a stock to buy to reach the desired allocation.
 
         :param stock: str - Stock symbol.
         :param desired_allocation: float - The desired allocation percentage.
         :param current_allocation: float - The current allocation percentage.
+        :param total_pv: float - Total portfolio value.
         :return: float - The amount of stock to buy.
         """
-        total_portfolio_value = sum([info['quantity'] * info['current_price'] for info in self.current_investments.values()])
-        desired_stock_value = desired_allocation * total_portfolio_value
-        current_stock_value = current_allocation * total_portfolio_value
-
-        amount_to_buy_value = desired_stock_value - current_stock_value
-        return amount_to_buy_value / self.current_investments[stock]['current_price']
+        self._ensure_investments_loaded()
+        return (desired_allocation - current_allocation) * total_pv / self._price[self._idx[stock]]
 
-    def calculate_amount_to_sell(self, stock, desired_allocation, current_allocation):
+    def calculate_amount_to_sell(self, stock, desired_allocation, current_allocation, total_pv):
         """
         Calculate the amount of a stock to sell to reach the desired allocation.
 
         :param stock: str - Stock symbol.
         :param desired_allocation: float - The desired allocation percentage.
         :param current_allocation: float - The current allocation percentage.
+        :param total_pv: float - Total portfolio value.
         :return: float - The amount of stock to sell.
         """
-        total_portfolio_value = sum([info['quantity'] * info['current_price'] for info in self.current_investments.values()])
-        desired_stock_value = desired_allocation * total_portfolio_value
-        current_stock_value = current_allocation * total_portfolio_value
+        self._ensure_investments_loaded()
+        return (current_allocation - desired_allocation) * total_pv / self._price[self._idx[stock]]
 
-        amount_to_sell_value = current_stock_value - desired_stock_value
-        return amount_to_sell_value / self.current_investments[stock]['current_price']
 
 
-
-    def should_buy(self, stock, market_info):
+    def should_buy(self):
         """
-        Determine whether to buy a stock.
+        Determine which stocks in market_knowledge to buy.
 
-        :param stock: str - Stock symbol.
-        :param market_info: dict - Market information about the stock.
-        :return: bool - True if the stock should be bought, else False.
+        :return: np.ndarray - Boolean mask, True where the stock should be bought.
         """
         # Simple decision-making logic to buy stock
         # Example: Buy if the market sentiment is positive and the stock is undervalued
-        return market_info['sentiment'] > 0.5 and market_info['is_undervalued']
+        return (self._mk_flags & self.MK_BUY) == self.MK_BUY
 
-    def should_sell(self, stock, market_info):
+    def should_sell(self):
         """
-        Determine whether to sell a stock.
+        Determine which stocks in market_knowledge to sell.
 
-        :param stock: str - Stock symbol.
-        :param market_info: dict - Market information about the stock.
-        :return: bool - True if the stock should be sold, else False.
+        :return: np.ndarray - Boolean mask, True where the stock should be sold.
         """
         # Simple decision-making logic to sell stock
         # Example: Sell if the stock is overvalued or if the market sentiment is negative
-        return market_info['sentiment'] < 0.5 or market_info['is_overvalued']
+        return (self._mk_flags & self.MK_SELL) != 0
 
     def buy_stock(self, stock, amount):
         """
@@ -190,15 +459,19 @@ class Persona:
         :param stock: str - The stock symbol.
         :param amount: float - The amount of the stock to buy.
         """
+        self._ensure_investments_loaded()
         # Check if the stock is already in the portfolio
-        if stock in self.current_investments:
-            self.current_investments[stock]['quantity'] += amount
+        if stock in self._idx:
+            self._qty[self._idx[stock]] += amount
         else:
             # If not, add the stock to the portfolio
-            self.current_investments[stock] = {'quantity': amount, 'purchase_price': self.market_knowledge[stock]['current_price']}
+            self._add_stock(stock, amount, self._mk_price[self._mk_idx[stock]])
+        price = self._price[self._idx[stock]]
+        self._pv += amount * price
+        self._record_transactions(self.TX_BUY, [stock], amount, price)
         
         # Deduct the cost of purchase from the cash reserves (assuming cash reserves are being tracked)
-        # self.cash_reserves -= amount * self.market_knowledge[stock]['current_price']
+        # self.cash_reserves -= amount * self._mk_price[self._mk_idx[stock]]
 
 
     def sell_stock(self, stock, amount):
@@ -208,45 +481,120 @@ class Persona:
         :param stock: str - The stock symbol.
         :param amount: float - The amount of the stock to sell.
         """
-        if stock in self.current_investments and self.current_investments[stock]['quantity'] >= amount:
-            self.current_investments[stock]['quantity'] -= amount
+        self._ensure_investments_loaded()
+        i = self._idx.get(stock)
+        if i is not None and self._qty[i] >= amount:
+            self._qty[i] -= amount
+            self._pv -= amount * self._price[i]
+            self._record_transactions(self.TX_SELL, [stock], amount, self._price[i])
             
             # Add the revenue from the sale to the cash reserves
-            # self.cash_reserves += amount * self.market_knowledge[stock]['current_price']
+            # self.cash_reserves += amount * self._mk_price[self._mk_idx[stock]]
 
             # Remove the stock from the portfolio if the quantity reaches zero
-            if self.current_investments[stock]['quantity'] == 0:
-                del self.current_investments[stock]
+            if self._qty[i] == 0:
+                self._remove_stocks(i)
         else:
             # Handle the case where the stock is not in the portfolio or not enough quantity is available to sell
             # This could be logging an error, raising an exception, etc.
             pass
 
 
+    def _record_transactions(self, side, stocks, qty, price):
+        """
+        Write transactions into the ring buffer, all stamped with the current time.
+
+        :param side: int or np.ndarray - TX_BUY or TX_SELL for each transaction.
+        :param stocks: sequence of str - Stock symbol of each transaction.
+        :param qty: float or np.ndarray - Quantity traded.
+        :param price: float or np.ndarray - Price per unit.
+        """
+        sym = np.empty(len(stocks), dtype=np.int32)
+        for k, stock in enumerate(stocks):
+            if stock not in self._tx_sym_ids:
+                self._tx_sym_ids[stock] = len(self.transaction_symbols)
+                self.transaction_symbols.append(stock)
+            sym[k] = self._tx_sym_ids[stock]
+
+        slots = (self._tx_head + np.arange(len(sym))) % self.TX_CAPACITY
+        self._tx['t'][slots] = time.time_ns()
+        self._tx['side'][slots] = side
+        self._tx['sym'][slots] = sym
+        self._tx['qty'][slots] = qty
+        self._tx['px'][slots] = price
+
+        self._tx_full = self._tx_full or self._tx_head + len(sym) >= self.TX_CAPACITY
+        self._tx_head = (self._tx_head + len(sym)) % self.TX_CAPACITY
+
+    @property
+    def transaction_history(self):
+        """
+        Recorded transactions, oldest first. Only the last TX_CAPACITY are kept.
+
+        :return: np.ndarray - Structured array with fields 't' (ns timestamp),
+            'side' (TX_BUY/TX_SELL), 'sym' (index into transaction_symbols),
+            'qty' and 'px'.
+        """
+        if self._tx_full:
+            return np.concatenate((self._tx[self._tx_head:], self._tx[:self._tx_head]))
+        return self._tx[:self._tx_head]
+
+    def _add_stock(self, stock, amount, price):
+        """
+        Append a new row to the holding arrays.
+
+        :param stock: str - The stock symbol.
+        :param amount: float - The quantity held.
+        :param price: float - The market price, used as the purchase price.
+        """
+        self._idx[stock] = self._n
+        self._n += 1
+        self._symbols = np.append(self._symbols, np.array([stock], dtype=object))
+        self._qty = np.append(self._qty, amount)
+        self._price = np.append(self._price, price)
+        self._purchase_price = np.append(self._purchase_price, price)
+        self._risk_score = np.append(self._risk_score, 0.0)
+        self._desired_allocation = np.append(self._desired_allocation, 0.0)
+        self._should_rebalance = np.append(self._should_rebalance, False)
+
+    def _remove_stocks(self, rows):
+        """
+        Drop rows from the holding arrays and reindex the remaining stocks.
+
+        :param rows: int or np.ndarray - Row(s) of the stocks to remove.
+        """
+        keep = np.ones(self._n, dtype=np.bool_)
+        keep[rows] = False
+        self._symbols = self._symbols[keep]
+        self._qty = self._qty[keep]
+        self._price = self._price[keep]
+        self._purchase_price = self._purchase_price[keep]
+        self._risk_score = self._risk_score[keep]
+        self._desired_allocation = self._desired_allocation[keep]
+        self._should_rebalance = self._should_rebalance[keep]
+        self._idx = {stock: j for j, stock in enumerate(self._symbols)}
+        self._n = len(self._idx)
+
+
     def evaluate_performance(self):
         """
         Evaluate the performance of the persona's investments.
         """
-        total_return = 0
-        for stock, info in self.current_investments.items():
-            # Calculate returns for each stock
-            stock_return = (info['current_price'] - info['purchase_price']) / info['purchase_price']
-            total_return += stock_return
-
-        return total_return / len(self.current_investments)
+        self._ensure_investments_loaded()
+        if self._n == 0:
+            return 0.0
+        return _sum_return(self._price, self._purchase_price) / self._n
 
 
     def assess_risk(self):
         """
         Assess the risk of the current investment portfolio.
         """
-        portfolio_risk = 0
-        for stock, info in self.current_investments.items():
-            # Assume 'risk_score' is part of info
-            portfolio_risk += info['risk_score']
-
-        average_risk = portfolio_risk / len(self.current_investments)
-        return average_risk
+        self._ensure_investments_loaded()
+        # Assume 'risk_score' was provided with each holding
+        if self._n == 0:
+            return 0.0
+        return _sum_risk(self._risk_score) / self._n
 
         
 
@@ -254,9 +602,20 @@ class Persona:
         """
         Conduct market research to update market knowledge.
         """
+        self._ensure_investments_loaded()
         # This is a placeholder for market research logic
         # In a real-world scenario, this would involve analyzing market data, reports, etc.
         new_market_info = {}  # Assume this is obtained from research
-        self.market_knowledge.update(new_market_info)
+        # market_knowledge may be the shared default, so never update it in place
+        self.market_knowledge = {**self.market_knowledge, **new_market_info}
+        self._index_market_knowledge()
+
+        # Mark the stocks we hold to their new market price
+        for stock, market_info in new_market_info.items():
+            i = self._idx.get(stock)
+            if i is not None:
+                new_price = market_info['current_price']
+                self._pv += (new_price - self._price[i]) * self._qty[i]
+                self._price[i] = new_price
 
 